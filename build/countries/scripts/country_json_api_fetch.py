@@ -1,7 +1,17 @@
+import http.client
 import json
+import urllib.error
 import urllib.request
 import os
-import re
+import shutil
+import string
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from json.encoder import encode_basestring as _encode_string
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from xml.etree import ElementTree
 
 # =================CONFIGURATION =================
 # Define paths relative to this script
@@ -12,25 +22,129 @@ EXTENSION_ROOT = os.path.abspath(os.path.join(BASE_DIR, "../../../extension"))
 API_URL = "https://restcountries.com/v3.1/all?fields=name,cca2,idd,flags"
 JSON_OUTPUT_DIR = os.path.join(EXTENSION_ROOT, "assets/data/json")
 JSON_FILENAME = "countries.json"
-SVG_OUTPUT_DIR = os.path.join(EXTENSION_ROOT, "assets/data/svg")
+SVG_OUTPUT_DIR = Path(EXTENSION_ROOT) / "assets/data/svg"
 XML_FILE_PATH = os.path.join(EXTENSION_ROOT, "all-in-one-clipboard.gresource.xml")
 
+# Local copy of the API response and its ETag/Last-Modified
+CACHE_PATH = os.path.join(BASE_DIR, ".countries_cache.json")
+CACHE_META = CACHE_PATH + ".meta"
+
+# Sidecar holding the ETag/Last-Modified of each downloaded flag
+SVG_ETAGS_PATH = os.path.join(BASE_DIR, "svg_etags.json")
+
+# Number of flags fetched in parallel
+MAX_DOWNLOAD_WORKERS = 32
+
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# Flag downloads follow at most this many redirects
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+MAX_REDIRECTS = 5
+
+# Chunk size for copying response bodies to disk, most flags fit in one read
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Regional indicator pairs for every two-letter code, built once
+_FLAG_OFFSET = 127397
+_FLAG_EMOJI = {
+    a + b: chr(ord(a) + _FLAG_OFFSET) + chr(ord(b) + _FLAG_OFFSET)
+    for a in string.ascii_uppercase
+    for b in string.ascii_uppercase
+}
+
+# Fixed layout of a serialized country record
+_COUNTRY_TEMPLATE = '{{"name": {name}, "code": {code}, "dial_code": {dial_code}, "emoji": {emoji}, "flag_path": {flag_path}}}'
+
+# Keep-alive connections, one set per download thread
+_thread_state = threading.local()
+
 # ================= LOGIC =================
 
+def load_cache_meta():
+    """Returns the validators of the cached API response, if any."""
+    if not (os.path.exists(CACHE_PATH) and os.path.exists(CACHE_META)):
+        return {}
+    try:
+        with open(CACHE_META, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not read {CACHE_META}: {e}")
+        return {}
+
+def save_cache(response):
+    """
+    Writes the response body to the cache and returns the parsed data.
+    Parsing still reads the whole body into memory, the same as json.loads(response.read()).
+    The body goes to a sibling temp file that replaces the cache only once it parsed,
+    so an interrupted transfer never destroys the last good copy.
+    A cache that cannot be written is only a warning, the body is then parsed in memory.
+    """
+    try:
+        tmp = tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(CACHE_PATH), suffix='.tmp', delete=False)
+    except OSError as e:
+        print(f"Warning: Could not write API cache: {e}")
+        return json.loads(response.read())
+
+    try:
+        with tmp:
+            shutil.copyfileobj(response, tmp, COPY_BUFFER_SIZE)
+        # Parse the copy on disk, so the cache is only replaced by a body that is valid JSON
+        with open(tmp.name, 'rb') as f:
+            data = json.loads(f.read())
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+
+    try:
+        # Drop the old validators first so they never pair with the new body
+        if os.path.exists(CACHE_META):
+            os.remove(CACHE_META)
+        os.replace(tmp.name, CACHE_PATH)
+        with open(CACHE_META, 'w', encoding='utf-8') as f:
+            json.dump({
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }, f, indent=2)
+    except OSError as e:
+        print(f"Warning: Could not write API cache: {e}")
+        if os.path.exists(tmp.name):
+            os.unlink(tmp.name)
+
+    return data
+
 def fetch_api_data():
     print(f"Fetching data from {API_URL}...")
-    headers = {'User-Agent': 'Mozilla/5.0'}
+    headers = dict(HEADERS)
+    meta = load_cache_meta()
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
     req = urllib.request.Request(API_URL, headers=headers)
     try:
         with urllib.request.urlopen(req) as response:
             if response.status != 200:
                 print(f"Error: Received status code {response.status}")
                 return None
-            return json.loads(response.read().decode())
+            return save_cache(response)
+    except urllib.error.HTTPError as e:
+        # urllib reports 304 Not Modified as an error
+        if e.code != 304:
+            print(f"Error fetching data: {e}")
+            return None
+        print("Data not modified, using cached copy.")
     except Exception as e:
         print(f"Error fetching data: {e}")
         return None
 
+    try:
+        with open(CACHE_PATH, 'rb') as f:
+            return json.loads(f.read())
+    except Exception as e:
+        print(f"Error reading cached data: {e}")
+        return None
+
 def get_gresource_prefix(xml_path):
     """
     Reads the XML file to find the <gresource prefix="..."> attribute.
@@ -42,42 +156,189 @@ def get_gresource_prefix(xml_path):
         return default_prefix
 
     try:
-        with open(xml_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            match = re.search(r'<gresource\s+prefix="([^"]+)"', content)
-            if match:
-                return match.group(1)
+        # Parse incrementally and stop at the first <gresource> element
+        with open(xml_path, 'rb') as f:
+            for _event, elem in ElementTree.iterparse(f, events=('start',)):
+                if elem.tag == 'gresource':
+                    return elem.get('prefix') or default_prefix
     except Exception as e:
         print(f"Error reading XML prefix: {e}")
 
     return default_prefix
 
-def download_svg(url, cca2):
-    """Downloads the SVG and saves it locally."""
+def get_connection(scheme, host):
+    """
+    Returns a keep-alive connection to the host for the calling thread.
+    Reusing it avoids a new TCP/TLS handshake for every flag.
+    """
+    connections = getattr(_thread_state, 'connections', None)
+    if connections is None:
+        connections = _thread_state.connections = {}
+
+    conn = connections.get((scheme, host))
+    if conn is None:
+        conn_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        conn = connections[(scheme, host)] = conn_class(host, timeout=30)
+    return conn
+
+def drop_connection(scheme, host):
+    """Closes and forgets the calling thread's connection to the host."""
+    connections = getattr(_thread_state, 'connections', {})
+    conn = connections.pop((scheme, host), None)
+    if conn:
+        conn.close()
+
+def drop_all_connections():
+    """
+    Closes every pooled connection of the calling thread.
+    Used when a response was abandoned halfway, since its connection can't serve another request.
+    """
+    connections = getattr(_thread_state, 'connections', {})
+    while connections:
+        _key, conn = connections.popitem()
+        conn.close()
+
+def load_svg_etags():
+    """Loads the cached flag validators, keyed by country code."""
+    if not os.path.exists(SVG_ETAGS_PATH):
+        return {}
+    try:
+        with open(SVG_ETAGS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not read {SVG_ETAGS_PATH}: {e}")
+        return {}
+
+def save_svg_etags(etags):
+    try:
+        with open(SVG_ETAGS_PATH, 'w', encoding='utf-8') as f:
+            json.dump(etags, f, indent=2, sort_keys=True)
+    except Exception as e:
+        print(f"Warning: Could not write {SVG_ETAGS_PATH}: {e}")
+
+def send_request(scheme, host, path, headers):
+    """
+    Sends a GET over the calling thread's pooled connection.
+    If the server already closed the idle keep-alive connection, retries once on a fresh one.
+    """
+    try:
+        try:
+            conn = get_connection(scheme, host)
+            conn.request('GET', path, headers=headers)
+            return conn.getresponse()
+        except (ConnectionResetError, BrokenPipeError):
+            drop_connection(scheme, host)
+
+        conn = get_connection(scheme, host)
+        conn.request('GET', path, headers=headers)
+        return conn.getresponse()
+    except Exception:
+        # Never hand a half-used connection to the next request
+        drop_connection(scheme, host)
+        raise
+
+def open_with_urllib(url, headers):
+    """Sends a GET through urllib, which applies proxies and follows redirects itself."""
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        return urllib.request.urlopen(req, timeout=30)
+    except urllib.error.HTTPError as e:
+        # urllib raises for 304 and errors, hand them back as a response like http.client does
+        return e
+
+def open_url(url, headers):
+    """
+    Sends a GET for the url and returns the response, following redirects.
+    Uses the pooled connections, unless a proxy is configured for the scheme,
+    in which case urllib sends the request so HTTP(S)_PROXY is honoured.
+    """
+    proxies = urllib.request.getproxies()
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        if parts.scheme in proxies and not urllib.request.proxy_bypass(parts.hostname or ''):
+            return open_with_urllib(url, headers)
+
+        path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        response = send_request(parts.scheme, parts.netloc, path, headers)
+        location = response.headers.get('Location')
+        if response.status not in REDIRECT_STATUSES or not location:
+            return response
+
+        # Drain the body so the connection can be reused
+        response.read()
+        url = urljoin(url, location)
+
+    raise http.client.HTTPException(f"Too many redirects (more than {MAX_REDIRECTS})")
+
+def download_svg(url, cca2, cached=None):
+    """
+    Downloads the SVG and saves it locally.
+    If the file on disk matches the size recorded after its last complete download,
+    a conditional GET is sent and the local copy is kept on 304 Not Modified.
+    Returns a (filename, validators) tuple. validators is None when the cached
+    entry should be left as is, and an empty dict when it must be forgotten.
+    """
     if not url or not url.endswith('.svg'):
-        return None
+        return None, None
 
     filename = f"{cca2.lower()}.svg"
-    filepath = os.path.join(SVG_OUTPUT_DIR, filename)
+    filepath = SVG_OUTPUT_DIR / filename
 
-    # Don't re-download if it exists (optional, removed for fresh sync)
-    # if os.path.exists(filepath): return filename
+    # Only revalidate a file that came from a complete download
+    headers = dict(HEADERS)
+    if cached and filepath.exists() and filepath.stat().st_size == cached.get('size'):
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
 
     try:
-        urllib.request.urlretrieve(url, filepath)
-        return filename
+        response = open_url(url, headers)
+        if response.status == 304:
+            response.read()
+            return filename, cached
+        if response.status != 200:
+            # Drain the body so the connection can be reused
+            response.read()
+            print(f"Failed to download flag for {cca2}: HTTP {response.status}")
+            return None, None
+        # Download next to the flag and swap it in, so a failed transfer never leaves a partial SVG
+        tmp_path = filepath.with_name(f"{filename}.part")
+        try:
+            with open(tmp_path, 'wb') as f:
+                shutil.copyfileobj(response, f, COPY_BUFFER_SIZE)
+                received = f.tell()
+            # http.client returns a short body silently when the peer closes early
+            expected = response.headers.get('Content-Length')
+            if expected is not None and received != int(expected):
+                raise urllib.error.ContentTooShortError(
+                    f"retrieval incomplete: got only {received} out of {expected} bytes", None)
+            os.replace(tmp_path, filepath)
+        except Exception as e:
+            drop_all_connections()
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            print(f"Failed to download flag for {cca2}: {e}")
+            # Forget the validators so the next run fetches the flag in full
+            return None, {}
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': received,
+        }
+        return filename, validators
     except Exception as e:
+        drop_all_connections()
         print(f"Failed to download flag for {cca2}: {e}")
-        return None
+        return None, None
 
 def get_flag_emoji(country_code):
     if not country_code or len(country_code) != 2: return None
-    try:
-        OFFSET = 127397
-        code = country_code.upper()
-        if not code.isalpha(): return None
-        return chr(ord(code[0]) + OFFSET) + chr(ord(code[1]) + OFFSET)
-    except: return None
+    return _FLAG_EMOJI.get(country_code.upper())
 
 def format_dial_code(root, suffixes, cca2):
     if not root: return None
@@ -92,6 +353,20 @@ def format_dial_code(root, suffixes, cca2):
     suffix = suffixes[0] if suffixes else ""
     return f"{root}{suffix}"
 
+def encode_country(item):
+    """
+    Serializes one country record.
+    Every record has the same shape and only string values, so a fixed template
+    produces the same text as json.dumps(item, ensure_ascii=False) without its generic dispatch.
+    """
+    return _COUNTRY_TEMPLATE.format(
+        name=_encode_string(item["name"]),
+        code=_encode_string(item["code"]),
+        dial_code=_encode_string(item["dial_code"]),
+        emoji=_encode_string(item["emoji"]),
+        flag_path=_encode_string(item["flag_path"]),
+    )
+
 def update_gresource_xml(svg_files):
     """
     Updates the .gresource.xml file to include the new SVGs.
@@ -103,36 +378,38 @@ def update_gresource_xml(svg_files):
 
     print("Updating GResource XML...")
 
-    with open(XML_FILE_PATH, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    new_lines = []
-    in_gresource = False
-
     # We will filter out old SVG flag lines to avoid duplicates/stale files
     svg_rel_path = "assets/data/svg/"
 
-    for line in lines:
-        # If the line contains a reference to the flags folder, skip it (we will regenerate them)
-        if svg_rel_path in line and "<file>" in line:
-            continue
+    # Sort and format the entries once, only the indentation depends on the manifest
+    file_entries = [f"<file>{svg_rel_path}{filename}</file>" for filename in sorted(svg_files)]
+
+    # Stream into a sibling temp file and swap it in, so a crash never leaves a half-written manifest
+    xml_dir = os.path.dirname(XML_FILE_PATH)
+    tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=xml_dir, suffix='.tmp', delete=False)
+    try:
+        with open(XML_FILE_PATH, 'r', encoding='utf-8') as src, tmp as dst:
+            for line in src:
+                # If the line contains a reference to the flags folder, skip it (we will regenerate them)
+                if svg_rel_path in line and "<file>" in line:
+                    continue
 
-        # Check for the closing tag of gresource to insert our files before it
-        if "</gresource>" in line:
-            # Calculate the indentation of the closing tag itself
-            closing_tag_indent = line[:len(line) - len(line.lstrip())]
+                # Check for the closing tag of gresource to insert our files before it
+                if "</gresource>" in line:
+                    # Calculate the indentation of the closing tag itself
+                    closing_tag_indent = line[:len(line) - len(line.lstrip())]
 
-            # Add one level of indentation (e.g., 4 spaces) to that
-            file_indent = closing_tag_indent + "    " 
+                    # Add one level of indentation (e.g., 4 spaces) to that
+                    file_indent = closing_tag_indent + "    "
 
-            for filename in sorted(svg_files):
-                new_lines.append(f"{file_indent}<file>{svg_rel_path}{filename}</file>\n")
-            new_lines.append(line)
-        else:
-            new_lines.append(line)
+                    dst.write(''.join(f"{file_indent}{entry}\n" for entry in file_entries))
+                dst.write(line)
 
-    with open(XML_FILE_PATH, 'w', encoding='utf-8') as f:
-        f.writelines(new_lines)
+        shutil.copymode(XML_FILE_PATH, tmp.name)
+        os.replace(tmp.name, XML_FILE_PATH)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
 
     print("XML updated successfully.")
 
@@ -149,9 +426,9 @@ def main():
     print(f"Using GResource prefix: {resource_prefix}")
 
     processed_list = []
-    downloaded_svgs = []
+    downloads = []
 
-    print("Processing countries and downloading flags...")
+    print("Processing countries...")
 
     # Sort for clean JSON
     data.sort(key=lambda x: x.get('name', {}).get('common', ''))
@@ -165,31 +442,62 @@ def main():
         dial_code = format_dial_code(idd.get('root', ''), idd.get('suffixes', []), cca2)
         if not dial_code: continue
 
-        # Download SVG
+        # Queue SVG for download
         flags = country.get('flags', {})
         svg_url = flags.get('svg', '')
-        filename = download_svg(svg_url, cca2)
-
-        flag_resource_path = ""
-        if filename:
-            downloaded_svgs.append(filename)
-            # Construct the resource:// string
-            flag_resource_path = f"resource://{resource_prefix}/assets/data/svg/{filename}"
+        if svg_url:
+            downloads.append((svg_url, cca2))
 
         item = {
             "name": name,
             "code": cca2,
             "dial_code": dial_code,
             "emoji": get_flag_emoji(cca2) or "",
-            "flag_path": flag_resource_path
+            "flag_path": ""
         }
         processed_list.append(item)
 
-    # 3. Save JSON
+    # Download all flags concurrently, the work is network bound
+    print(f"Downloading {len(downloads)} flags...")
+    cached_etags = load_svg_etags()
+    # Start from the cache so a flag that fails this run keeps its validators,
+    # only countries that are no longer listed are dropped
+    queued = {cca2 for _url, cca2 in downloads}
+    etags = {cca2: validators for cca2, validators in cached_etags.items() if cca2 in queued}
+    downloaded = {}
+    with ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS) as executor:
+        futures = {
+            executor.submit(download_svg, url, cca2, cached_etags.get(cca2)): cca2
+            for url, cca2 in downloads
+        }
+        for future in as_completed(futures):
+            cca2 = futures[future]
+            filename, validators = future.result()
+            if filename:
+                downloaded[cca2] = filename
+            if validators:
+                etags[cca2] = validators
+            elif validators is not None:
+                etags.pop(cca2, None)
+    save_svg_etags(etags)
+
+    # 3. Save JSON, writing each country as soon as its flag path is known
     json_path = os.path.join(JSON_OUTPUT_DIR, JSON_FILENAME)
     print(f"Saving JSON to {json_path}...")
+
+    downloaded_svgs = []
     with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(processed_list, f, ensure_ascii=False, indent=2)
+        f.write("[\n")
+        for index, item in enumerate(processed_list):
+            filename = downloaded.get(item["code"])
+            if filename:
+                downloaded_svgs.append(filename)
+                # Construct the resource:// string
+                item["flag_path"] = f"resource://{resource_prefix}/assets/data/svg/{filename}"
+
+            separator = "  " if index == 0 else ",\n  "
+            f.write(separator + encode_country(item))
+        f.write("\n]\n")
 
     # 4. Update XML
     if downloaded_svgs:
@@ -15,6 +15,8 @@ Example:
 import json
 import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -63,69 +65,86 @@ msgstr ""
 # Escapes quotes and backslashes for POT format
 def escape_string(s):
     """Escapes quotes and backslashes for POT format."""
+    # Most strings need no escaping, skip the copies for those
+    if '\\' not in s and '"' not in s:
+        return s
     return s.replace('\\', '\\\\').replace('"', '\\"')
 
-# Recursively extracts translatable strings from any JSON structure
-def extract_strings_recursive(obj, string_set):
+# Walks any JSON structure and extracts translatable strings
+def extract_strings(root, string_set):
     """
-    Recursively extracts translatable strings from any JSON structure.
+    Walks any JSON structure and extracts translatable strings.
 
     Looks for keys defined in TRANSLATABLE_KEYS and extracts their string values.
     Handles both direct string values and arrays of strings (like keywords).
+    Uses an explicit stack instead of recursion to avoid a call per node.
 
     Args:
-        obj: The JSON object (dict, list, or primitive) to process
+        root: The JSON object (dict, list, or primitive) to process
         string_set: Set to accumulate extracted strings
     """
-    if isinstance(obj, dict):
-        for key, value in obj.items():
-            if key in TRANSLATABLE_KEYS:
-                if isinstance(value, str) and value.strip():
-                    string_set.add(value.strip())
-                elif isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, str) and item.strip():
-                            string_set.add(item.strip())
-            else:
-                # Recurse into nested structures
-                extract_strings_recursive(value, string_set)
-    elif isinstance(obj, list):
-        for item in obj:
-            extract_strings_recursive(item, string_set)
+    # Bind globals and builtins to locals for faster lookups in the loop
+    translatable_keys = TRANSLATABLE_KEYS
+    _isinstance = isinstance
+    add = string_set.add
+
+    stack = deque([root])
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        obj = pop()
+        if _isinstance(obj, dict):
+            for key, value in obj.items():
+                if key in translatable_keys:
+                    if _isinstance(value, str):
+                        stripped = value.strip()
+                        if stripped:
+                            add(stripped)
+                    elif _isinstance(value, list):
+                        for item in value:
+                            if _isinstance(item, str):
+                                stripped = item.strip()
+                                if stripped:
+                                    add(stripped)
+                else:
+                    # Descend into nested structures
+                    push(value)
+        elif _isinstance(obj, list):
+            stack.extend(obj)
 
 # Processes a single JSON file and extracts translatable strings
-def process_json_file(json_path, string_set):
+def process_json_file(json_path):
     """
     Processes a single JSON file and extracts translatable strings.
 
+    Runs in a worker process, so it returns its own set instead of
+    mutating a shared one.
+
     Args:
         json_path: Path to the JSON file
-        string_set: Set to accumulate extracted strings
 
     Returns:
-        Number of strings extracted from this file
+        Set of strings extracted from this file
     """
-    initial_count = len(string_set)
+    string_set = set()
 
     try:
-        with open(json_path, 'r', encoding='utf-8') as json_file:
-            data = json.load(json_file)
+        with open(json_path, 'rb') as json_file:
+            data = json.loads(json_file.read())
 
         # Handle both wrapped ({"data": [...]}) and unwrapped ([...]) formats
         if isinstance(data, dict) and 'data' in data:
             data = data['data']
 
-        extract_strings_recursive(data, string_set)
-
-        extracted = len(string_set) - initial_count
-        return extracted
+        extract_strings(data, string_set)
 
     except json.JSONDecodeError as e:
         print(f"  Error: Invalid JSON in '{json_path.name}': {e}")
-        return 0
     except Exception as e:
         print(f"  Error processing '{json_path.name}': {e}")
-        return 0
+
+    return string_set
 
 # Auto-discovers all JSON files in the input directory
 def discover_json_files(input_dir):
@@ -147,11 +166,8 @@ def discover_json_files(input_dir):
                 print(f"  Skipping directory: {Path(current_dir) / directory}")
                 directories.remove(directory)
 
-        # Filter and collect JSON files
-        for filename in sorted(filenames):
-            if not filename.endswith('.json'):
-                continue
-
+        # Filter and collect JSON files, only sorting the ones that match
+        for filename in sorted(name for name in filenames if name.endswith('.json')):
             if filename in SKIP_FILES:
                 print(f"  Skipping file: {filename}")
                 continue
@@ -173,8 +189,7 @@ def generate_pot_file(output_path, strings, source_files):
         strings: Set of strings to include
         source_files: List of source file paths for comments
     """
-    # Remove empty strings and sort
-    strings.discard('')
+    # Empty strings are already filtered out during extraction
     sorted_strings = sorted(strings)
 
     # Generate source comment
@@ -182,13 +197,13 @@ def generate_pot_file(output_path, strings, source_files):
 
     creation_date = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M+0000')
 
-    with open(output_path, 'w', encoding='utf-8') as pot_file:
-        pot_file.write(POT_HEADER_TEMPLATE.format(creation_date=creation_date))
+    # Build the whole file first and write it once
+    header = POT_HEADER_TEMPLATE.format(creation_date=creation_date)
+    reference = f'#: {source_comment}\n'
+    body = ''.join(f'{reference}msgid "{escape_string(string)}"\nmsgstr ""\n\n' for string in sorted_strings)
 
-        for string in sorted_strings:
-            pot_file.write(f'#: {source_comment}\n')
-            pot_file.write(f'msgid "{escape_string(string)}"\n')
-            pot_file.write('msgstr ""\n\n')
+    with open(output_path, 'w', encoding='utf-8') as pot_file:
+        pot_file.write(header + body)
 
     return len(sorted_strings)
 
@@ -229,9 +244,12 @@ def main():
     # Extract strings from all files
     all_strings = set()
 
-    for json_path in json_files:
-        count = process_json_file(json_path, all_strings)
-        print(f"  {json_path.name}: {count} new strings")
+    # Parse files in parallel, merge in order so the per-file counts stay stable
+    with ProcessPoolExecutor() as executor:
+        for json_path, strings in zip(json_files, executor.map(process_json_file, json_files)):
+            count = len(strings - all_strings)
+            all_strings.update(strings)
+            print(f"  {json_path.name}: {count} new strings")
     print()
 
     # Generate output